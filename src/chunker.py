@@ -1,22 +1,46 @@
 import spacy
+import os
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from tqdm import tqdm
 import re
 
 
+# Components of en_core_web_sm that sentence splitting does not need. These are
+# excluded rather than disabled so they are never deserialized.
+_UNUSED_SPACY_COMPONENTS = ["ner", "lemmatizer", "attribute_ruler", "tagger"]
+
+# Collapses all whitespace, line breaks included, into a single space
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2)
+def _get_nlp(use_statistical: bool = False):
+    # Loading a spaCy pipeline is slow, so build it once and share it between chunkers.
+    if use_statistical:
+        # Only doc.sents is used, so keep the parser, which sets sentence boundaries
+        return spacy.load("en_core_web_sm", exclude=_UNUSED_SPACY_COMPONENTS)
+    # The rule-based sentencizer only splits on punctuation and is much faster than the parser
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+
 # Strategy Interface
 class ChunkingStrategy(ABC):
     @abstractmethod
     def chunk(self, text: str) -> list[str]:
         pass
 
+    def chunk_batch(self, texts: list[str]):
+        # Strategies that can process several documents at once override this
+        for text in texts:
+            yield self.chunk(text)
+
     def normilize_text(text: str) -> str:
-            # Replace line breaks that are not followed by another line break
-            # (i.e., within a paragraph) with a space
-            text = re.sub(r'\n(?!\n)', ' ', text)
-            # Optionally, collapse multiple spaces
-            text = re.sub(r'\s+', ' ', text)
-            return text.strip()
+            # Replace line breaks and runs of spaces with a single space in one pass.
+            # Matching \n separately first is not needed since \s+ already covers it.
+            return _WHITESPACE_RE.sub(' ', text).strip()
 
 
 # Concrete Strategy 1 — Fixed-size character chunks
@@ -25,20 +49,30 @@ class FixedSizeChunking(ChunkingStrategy):
         self.chunk_size = chunk_size
 
     def chunk(self, text: str) -> list[str]:
-        chunks = [text[i:i+self.chunk_size] for i in range(0, len(text), self.chunk_size)]
-        normilized_chunks = [ChunkingStrategy.normilize_text(chunk) for chunk in chunks]
-        return chunks
+        # Normalize the whole text once, then slice it into fixed windows
+        text = ChunkingStrategy.normilize_text(text)
+        return [text[i:i+self.chunk_size] for i in range(0, len(text), self.chunk_size)]
 
 
 # Concrete Strategy 2 — Sentence-based chunking
 class SentenceChunking(ChunkingStrategy):
+    def __init__(self, use_statistical: bool = False):
+        self.use_statistical = use_statistical
+        self.nlp = _get_nlp(use_statistical)
+
     def chunk(self, text: str) -> list[str]:
-        nlp = spacy.load("en_core_web_sm")
-        doc = nlp(text)
+        doc = self.nlp(text)
         sentences = [sent.text for sent in doc.sents]
         normilized_sentences = [ChunkingStrategy.normilize_text(sentence) for sentence in sentences]
         return sentences
 
+    def chunk_batch(self, texts: list[str]):
+        # Let spaCy batch the documents instead of calling nlp(text) once per text
+        batch_size = int(os.getenv("SPACY_BATCH_SIZE", 64))
+        n_process = int(os.getenv("SPACY_N_PROCESS", 1))
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield [sent.text for sent in doc.sents]
+
 
 # Concrete Strategy 3 — Paragraph-based chunking
 class ParagraphChunking(ChunkingStrategy):
@@ -75,56 +109,67 @@ class TokenLimitedChunking(ChunkingStrategy):
         )
     
         input_ids = tokenized["input_ids"]
-        attention_masks = tokenized["attention_mask"]
 
-        # Decode each chunk back into text
-        decoded_chunks = [
-            self.tokenizer.decode(ids, skip_special_tokens=True).strip()
-            for ids in input_ids
-        ]
+        # Decode all chunks back into text in one call to the tokenizer
+        decoded_chunks = self.tokenizer.batch_decode(input_ids, skip_special_tokens=True)
 
-        # normilized_decoded_chunks = [ChunkingStrategy.normilize_text(chunk) for chunk in decoded_chunks]
+        normilized_decoded_chunks = [ChunkingStrategy.normilize_text(chunk) for chunk in decoded_chunks]
 
-        return tokenized, decoded_chunks
+        return tokenized, normilized_decoded_chunks
 
 # Concrete Strategy 5 — Multi-sentence chunking up to a limit
 class MultiSentenceChunking(ChunkingStrategy):
-    def __init__(self, max_length: int):
+    def __init__(self, max_length: int, use_statistical: bool = False):
         self.max_length = max_length
+        self.sentence_chunker = SentenceChunking(use_statistical=use_statistical)
     
     def chunk(self, text: str) -> list[str]:
-        sentences = SentenceChunking().chunk(text)
+        sentences = self.sentence_chunker.chunk(text)
+        return self._group_sentences(sentences)
+
+    def chunk_batch(self, texts: list[str]):
+        for sentences in self.sentence_chunker.chunk_batch(texts):
+            yield self._group_sentences(sentences)
+
+    def _group_sentences(self, sentences: list[str]) -> list[str]:
         chunks = []
-        current_chunk = ""
+        # Collect the sentences of the current chunk and join them once, tracking
+        # the joined length separately instead of growing a string
+        current_chunk = []
+        current_length = 0
         for sentence in tqdm(sentences, total=len(sentences), desc="Chunking", unit="sentence"):
-            if len(current_chunk) + len(sentence) + 1 <= self.max_length:
-                current_chunk += (" " if current_chunk else "") + sentence
+            if current_length + len(sentence) + 1 <= self.max_length:
+                current_length += (1 if current_chunk else 0) + len(sentence)
+                current_chunk.append(sentence)
             else:
                 if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = sentence
+                    chunks.append(" ".join(current_chunk))
+                current_chunk = [sentence]
+                current_length = len(sentence)
         if current_chunk:
-            chunks.append(current_chunk)
+            chunks.append(" ".join(current_chunk))
         return chunks
 
 # Context — RAG Processor
 class RAGProcessor:
     def __init__(self, chunking_strategy: ChunkingStrategy):
         self.chunking_strategy = chunking_strategy
+        # Pick the processing path once instead of checking the strategy type on every call
+        if isinstance(chunking_strategy, TokenLimitedChunking):
+            self._process = self._process_token
+        else:
+            self._process = self._process_text
 
     def process_document(self, text: str):
-        chunks = self.chunking_strategy.chunk(text)
-        normilized_chunks = []
-
-        if self.chunking_strategy.__class__.__name__ == "TokenLimitedChunking":
-            num_chunks = len(chunks['input_ids'])
-            print(f"Chunks generated ({num_chunks})")
-            for ids in chunks['input_ids']:
-                decoded = self.chunking_strategy.tokenizer.decode(ids, skip_special_tokens=True).strip()
-                normilized_chunks.append(ChunkingStrategy.normilize_text(decoded))
-        else:
-            print(f"Chunks generated ({len(chunks)})")
-            for chunk in chunks:
-                normilized_chunks.append(ChunkingStrategy.normilize_text(chunk))
+        return self._process(text)
 
-        return normilized_chunks
\ No newline at end of file
+    def _process_token(self, text: str):
+        # The chunker already decodes and normalizes each token window
+        _, normilized_chunks = self.chunking_strategy.chunk(text)
+        print(f"Chunks generated ({len(normilized_chunks)})")
+        return normilized_chunks
+
+    def _process_text(self, text: str):
+        chunks = self.chunking_strategy.chunk(text)
+        print(f"Chunks generated ({len(chunks)})")
+        return [ChunkingStrategy.normilize_text(chunk) for chunk in chunks]
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Document:
     def __init__(self, vector: list, text: str = "", source: str = ""):
         self.vector = vector
@@ -11,4 +14,44 @@ class Document:
         }
 
     def __repr__(self):
-        return f"Document(text={self.text[:50]!r}..., vector={self.vector!r}, source={self.source!r})"
\ No newline at end of file
+        return f"Document(text={self.text[:50]!r}..., vector={self.vector!r}, source={self.source!r})"
+
+
+class DocumentCollection:
+    """
+    Stores chunks as parallel columns: one (N, D) vector matrix plus lists of texts and sources.
+    Indexing returns a Document view whose vector is a row of the shared matrix.
+    """
+    def __init__(self, vectors: np.ndarray = None, texts: list[str] = None, sources: list[str] = None):
+        self.vectors = vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+        self.texts = texts or []
+        self.sources = sources or []
+
+    @classmethod
+    def from_batches(cls, batches):
+        '''
+        Batches: Iterable of tuples (vectors, texts, source), one per file
+        '''
+        vector_batches, texts, sources = [], [], []
+        for vectors, batch_texts, source in batches:
+            vector_batches.append(vectors)
+            texts.extend(batch_texts)
+            sources.extend([source] * len(batch_texts))
+        vectors = np.concatenate(vector_batches) if vector_batches else None
+        return cls(vectors, texts, sources)
+
+    def get_metadata(self, start: int, stop: int):
+        return [
+            {"text": text, "source": source}
+            for text, source in zip(self.texts[start:stop], self.sources[start:stop])
+        ]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, i: int):
+        return Document(vector=self.vectors[i], text=self.texts[i], source=self.sources[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
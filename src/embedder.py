@@ -1,43 +1,124 @@
 from transformers import AutoTokenizer, AutoModel
 from abc import ABC, abstractmethod
+import numpy as np
 import torch
 import torch.nn.functional as F
 from tqdm import tqdm
 
+# Scale for symmetric int8 quantization of L2-normalized embeddings (every component is in [-1, 1])
+INT8_SCALE = 127
+
 class Embedder(ABC):
     @abstractmethod
-    def embed(self, inputs, already_tokenized: bool = False) -> str:
+    def embed(self, inputs, already_tokenized: bool = False, batch_size: int = None) -> str:
         pass
 
 class Qwen3Embedder:
-    def __init__(self, model_name="Qwen/Qwen3-Embedding-4B", device=None):
+    def __init__(self, model_name="Qwen/Qwen3-Embedding-4B", device=None, dtype=None, int8=False, compile_model=False):
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.device_is_cuda = str(self.device).startswith("cuda")
+        # Half precision halves memory traffic and uses tensor cores on GPU; stay in FP32 on CPU
+        if dtype is None:
+            if self.device_is_cuda:
+                dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            else:
+                dtype = torch.float32
+        self.dtype = dtype
+        # Optionally return int8 embeddings (round(x * INT8_SCALE)) to shrink host copies and storage
+        self.int8 = int8
+        self.out_dtype = torch.int8 if int8 else torch.float32
         self.tokenizer = AutoTokenizer.from_pretrained(model_name, padding_side="left")
-        self.model = AutoModel.from_pretrained(model_name).to(self.device)
-        self.model.eval()
+        self.model = AutoModel.from_pretrained(model_name, torch_dtype=self.dtype).to(self.device)
+        # Embedding only needs one forward pass, so no KV cache and no autograd state
+        self.model.config.use_cache = False
+        self.model = self.model.eval().requires_grad_(False)
+        if compile_model and hasattr(torch, "compile"):
+            # Fuse the forward pass kernels; dynamic shapes avoid a recompile for every new sequence length
+            self.model = torch.compile(self.model, dynamic=True, fullgraph=False)
 
     @staticmethod
     def last_token_pool(last_hidden_states, attention_mask):
+        # With left padding (the tokenizer default here) the last position is always a real token
+        left_padding = attention_mask[:, -1].all()
+        if left_padding:
+            return last_hidden_states[:, -1]
         seq_lens = attention_mask.sum(dim=1) - 1
-        return last_hidden_states[torch.arange(seq_lens.size(0)), seq_lens]
+        # Right padding: gather the hidden state at seq_lens for each row along the sequence dim
+        idx = seq_lens.view(-1, 1, 1).expand(-1, 1, last_hidden_states.size(-1))
+        return last_hidden_states.gather(1, idx).squeeze(1)
+
+    def embed(self, inputs, already_tokenized=False, batch_size=None):
+        if already_tokenized:
+            count = len(inputs["input_ids"])
+            order = list(range(count))
+        else:
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            count = len(inputs)
+            # Sort by length so each sub-batch is padded only to the longest of similar-length texts
+            order = sorted(range(count), key=lambda i: len(inputs[i]))
+
+        hidden_size = self.model.config.hidden_size
+        embeddings = np.empty((count, hidden_size), dtype=np.int8 if self.int8 else np.float32)
+        if count == 0:
+            return embeddings
+        batch_size = batch_size or count
+
+        if self.device_is_cuda:
+            # Two pinned batch-sized buffers alternate, so one batch's device to host copy
+            # overlaps the next forward pass. They are freed when the call returns.
+            buffers = [torch.empty((batch_size, hidden_size), dtype=self.out_dtype, pin_memory=True) for _ in range(2)]
+        pending = []
+        for n, start in enumerate(tqdm(range(0, count, batch_size), desc="Embedding chunks", disable=count <= batch_size)):
+            rows = order[start:start+batch_size]
+            if already_tokenized:
+                batch = {k: inputs[k][start:start+batch_size] for k in ("input_ids", "attention_mask")}
+            else:
+                batch = self.tokenizer(
+                    [inputs[i] for i in rows],
+                    return_tensors="pt",
+                    padding="longest",
+                    truncation=True,
+                    max_length=8192
+                )
+            pooled = self._embed_tokenized(batch)
+            if not self.device_is_cuda:
+                # Scatter the batch back to the caller's order
+                embeddings[rows] = pooled.numpy()
+                continue
 
-    def embed(self, inputs, already_tokenized=False):
-        # Tokenize only if not already tokenized
-        if not already_tokenized:
-            inputs = self.tokenizer(
-                inputs,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=8192
-            )
+            if len(pending) == len(buffers):
+                # The buffer about to be reused still holds the batch from two steps back
+                self._collect_batch(pending.pop(0), embeddings)
+            buffer = buffers[n % len(buffers)][:len(rows)]
+            # Queue the device to host copy and move on to the next batch without waiting for it
+            buffer.copy_(pooled, non_blocking=True)
+            copied = torch.cuda.Event()
+            copied.record()
+            pending.append((copied, buffer, rows))
 
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        for batch_copy in pending:
+            self._collect_batch(batch_copy, embeddings)
+        return embeddings
 
-        with torch.no_grad():
-            outputs = self.model(**inputs)
+    @staticmethod
+    def _collect_batch(batch_copy, embeddings):
+        copied, buffer, rows = batch_copy
+        # Wait for this batch's copy only, then scatter it back to the caller's order
+        copied.synchronize()
+        embeddings[rows] = buffer.numpy()
+
+    def _embed_tokenized(self, inputs):
+        inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
+
+        with torch.inference_mode():
+            outputs = self.model(**inputs, use_cache=False)
 
         pooled = self.last_token_pool(outputs.last_hidden_state, inputs["attention_mask"])
+        # Normalize in FP32 so the returned vectors keep full precision
+        pooled = pooled.float()
         embeddings = F.normalize(pooled, p=2, dim=1)
-        return embeddings.cpu().numpy()
-
+        if self.int8:
+            # Quantize on the device so only a quarter of the bytes are copied back
+            embeddings = (embeddings * INT8_SCALE).round().to(torch.int8)
+        return embeddings
@@ -1,16 +1,39 @@
 from preprocessor import *
 from chunker import *
 from embedder import *
-from document import Document
+from document import DocumentCollection
 import os
+import json
+import numpy as np
+from functools import cached_property, lru_cache
 from dotenv import load_dotenv
 from pinecone import Pinecone
 
+
+# Pinecone rejects upsert requests over 2 MB
+PINECONE_MAX_REQUEST_BYTES = 2_000_000
+# Upper bound on the JSON size of one vector value; float32 values average about 22 characters
+_JSON_BYTES_PER_VALUE = 24
+# Room for the id, field names and separators of one vector entry
+_JSON_BYTES_PER_VECTOR = 64
+
+
+@lru_cache(maxsize=1)
+def _get_pinecone_client():
+    # One client (and one dotenv read) shared by every pipeline in the process
+    load_dotenv()
+    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+    return Pinecone(api_key=PINECONE_API_KEY, environment="us-east-1")
+
+
 class IngestionPipeline:
 
-    def __init__(self, chunker: ChunkingStrategy, embedder: Embedder):
+    def __init__(self, chunker: ChunkingStrategy, embedder: Embedder, max_in_flight: int = 8):
         self.chunker = chunker
         self.embedder = embedder
+        # Number of async Pinecone upserts pending at once, and threads in the index's pool
+        self.max_in_flight = max_in_flight
+        self.documents = DocumentCollection()
 
     def get_preprocessor(self, filename):
         ext = filename.lower().split('.')[-1]
@@ -26,41 +49,65 @@ class IngestionPipeline:
             case _:
                 raise ValueError(f"Unsupported file type: {ext}")
     
-    def pinecone_upload(self, documents: list[Document]):
+    @cached_property
+    def index(self):
         '''
-        Embeddings: List of tuples (file_name, text, vector)
+        Pinecone index handle, created on first use and reused for later uploads.
         '''
-        load_dotenv()
-        PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+        pc = _get_pinecone_client()
         INDEX_NAME = os.getenv("INDEX_NAME")
-        pc = Pinecone(api_key=PINECONE_API_KEY, environment="us-east-1")
-        index = pc.Index(INDEX_NAME)
-
-        # Prepare vectors for upsert
-        batch_size = 10
-        vectors_to_upsert = []
-        i = 0
-        for doc in documents:
-            i += 1
-            embed_id = f"chunk-{i}"
-            vectors_to_upsert.append((embed_id, doc.vector, doc.get_metadata()))
-
-            if len(vectors_to_upsert) >= batch_size:
-                index.upsert(vectors=vectors_to_upsert)
-                vectors_to_upsert = []
+        # Enough threads to run every in-flight async upsert at once
+        return pc.Index(INDEX_NAME, pool_threads=self.max_in_flight)
 
-        if vectors_to_upsert:
-            index.upsert(vectors=vectors_to_upsert)
+    def pinecone_upload(self, documents: DocumentCollection, batch_size=100, max_request_bytes=PINECONE_MAX_REQUEST_BYTES):
+        '''
+        Documents: DocumentCollection of vectors with their text and source
+        Each upsert holds at most batch_size vectors and stays under max_request_bytes of JSON,
+        Pinecone's 2 MB request limit by default. At 2560 dimensions that is about 30 vectors.
+        Upserts are sent asynchronously, with up to self.max_in_flight requests pending at once.
+        '''
+        index = self.index
+        vector_bytes = documents.vectors.shape[1] * _JSON_BYTES_PER_VALUE + _JSON_BYTES_PER_VECTOR
+
+        async_results = []
+        start = 0
+        while start < len(documents):
+            # Add vectors until the batch is full or the next one would push the request over the limit
+            stop = start
+            request_bytes = 0
+            while stop < len(documents) and stop - start < batch_size:
+                entry_bytes = vector_bytes + len(json.dumps(documents.get_metadata(stop, stop + 1)[0]))
+                if stop > start and request_bytes + entry_bytes > max_request_bytes:
+                    break
+                request_bytes += entry_bytes
+                stop += 1
+
+            # Slice the contiguous vector matrix instead of walking per-chunk objects
+            embed_ids = [f"chunk-{i}" for i in range(start + 1, stop + 1)]
+            vectors = documents.vectors[start:stop]
+            if vectors.dtype == np.int8:
+                # Pinecone dense indexes take float values, so dequantize just this batch
+                vectors = vectors.astype(np.float32) / INT8_SCALE
+            vectors_to_upsert = list(zip(embed_ids, vectors.tolist(), documents.get_metadata(start, stop)))
+            async_results.append(index.upsert(vectors=vectors_to_upsert, async_req=True))
+            start = stop
+
+            if len(async_results) >= self.max_in_flight:
+                # Wait for the pending requests before sending more
+                for result in async_results:
+                    result.get()
+                async_results = []
+
+        for result in async_results:
+            result.get()
     
     def pinecone_get_top_k(query, top_k=5):
         '''
         Get top k similar documents from Pinecone index for a given query.
         '''
 
-        load_dotenv()
-        PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+        pc = _get_pinecone_client()
         INDEX_NAME = os.getenv("INDEX_NAME")
-        pc = Pinecone(api_key=PINECONE_API_KEY, environment="us-east-1")
         index = pc.Index(INDEX_NAME)
     
         tokenized_query = Qwen3Embedder().tokenizer(
@@ -87,10 +134,11 @@ class IngestionPipeline:
 
     def process_documents(self, files, embeddings_batch_size=10):
         """
-        Create Document objects from a list of files by processing, chunking, and embedding them.
+        Create a DocumentCollection from a list of files by processing, chunking, and embedding them.
         """
         # files: List of file paths
-        documents = []
+        batches = []
+        preprocessed_docs = []
         for file_path in files:
             print(f"Processing file: {file_path}")
 
@@ -101,43 +149,38 @@ class IngestionPipeline:
                 continue
             
             file_name = os.path.basename(file_path)
-            preprocessed_doc = preprocessor.process(file_path)
+            preprocessed_docs.append((file_name, preprocessor.process(file_path)))
 
-            if isinstance(self.chunker, TokenLimitedChunking):
+        if isinstance(self.chunker, TokenLimitedChunking):
+            for file_name, preprocessed_doc in preprocessed_docs:
                 tokenized_chunks, decoded_chunks = self.chunker.chunk(preprocessed_doc)
 
                 chunk_count = len(tokenized_chunks["input_ids"])
                 print(f"Generated {chunk_count} chunks")
 
-                embeddings = []
-                for i in tqdm(range(0, chunk_count, embeddings_batch_size), desc="Embedding chunks"):
-                    batch_chunks = {
-                        "input_ids": tokenized_chunks["input_ids"][i:i+embeddings_batch_size],
-                        "attention_mask": tokenized_chunks["attention_mask"][i:i+embeddings_batch_size]
-                    }
-                    batch_embeddings = self.embedder.embed(batch_chunks, already_tokenized=True)
-                    embeddings.extend(batch_embeddings)
-
-                for embedding, decoded_chunk in zip(embeddings, decoded_chunks):
-                    documents.append(Document(vector=embedding, text=decoded_chunk, source=file_name))
-            
-            else:
-                chunks = self.chunker.chunk(preprocessed_doc)
+                # Batches are embedded back to back and copied to the host asynchronously
+                embeddings = self.embedder.embed(tokenized_chunks, already_tokenized=True, batch_size=embeddings_batch_size)
 
+                batches.append((embeddings, decoded_chunks, file_name))
+        
+        else:
+            # Chunk all documents in one call so batching strategies (e.g. spaCy's nlp.pipe) can be used
+            texts = [preprocessed_doc for _, preprocessed_doc in preprocessed_docs]
+            for (file_name, _), chunks in zip(preprocessed_docs, self.chunker.chunk_batch(texts)):
                 chunk_count = len(chunks)
                 print(f"Generated {chunk_count} chunks")
 
-                embeddings = []
-                for i in tqdm(range(0, chunk_count, embeddings_batch_size), desc="Embedding chunks"):
-                    batch_chunks = chunks[i:i+embeddings_batch_size]
-                    batch_embeddings = self.embedder.embed(batch_chunks, already_tokenized=True)
-                    embeddings.extend(batch_embeddings)
+                # The embedder sorts the chunks by length and splits them into sub-batches
+                embeddings = self.embedder.embed(chunks, batch_size=embeddings_batch_size)
 
-                for embedding, chunk in zip(embeddings, chunks):
-                    documents.append(Document(vector=embedding, text=chunk, source=file_name))
+                batches.append((embeddings, chunks, file_name))
         
+        documents = DocumentCollection.from_batches(batches)
+        self.documents = documents
+
         print(f"Total documents to upload: {len(documents)}")
         for doc in documents:
             print(doc)
         # self.pinecone_upload(documents)
+        return documents
         
\ No newline at end of file
@@ -1,11 +1,61 @@
 from abc import ABC, abstractmethod
 import pdfplumber
-import docx
+import zipfile
+import xml.etree.ElementTree as ET
 from bs4 import BeautifulSoup
+try:
+    import lxml.html as lxml_html
+    from lxml import etree
+except ImportError:  # lxml is optional, HTMLTextExtractor falls back to BeautifulSoup
+    lxml_html = None
 import unicodedata
 import re
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from tqdm import tqdm
 
+
+class _UnicodeCleanTable(dict):
+    # str.translate table that maps non-printable and control characters to a space.
+    # Entries are filled in the first time a character is seen, so later lookups
+    # stay inside translate's C loop.
+    def __missing__(self, codepoint):
+        ch = chr(codepoint)
+        if ch.isprintable() and unicodedata.category(ch)[0] != "C":
+            self[codepoint] = ch
+        else:
+            self[codepoint] = " "  # replace junk with a space
+        return self[codepoint]
+
+
+_CLEAN_TABLE = _UnicodeCleanTable()
+
+# lxml rejects str input that starts with an XML declaration naming an encoding
+_XML_DECLARATION_RE = re.compile(r"^\ufeff?\s*<\?xml[^>]*\?>")
+
+# WordprocessingML tags read by DocxTextExtractor
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_T, _W_TAB, _W_TABS, _W_BR, _W_CR, _W_TXBX_CONTENT, _W_TYPE = (
+    _W_NS + tag for tag in ("p", "t", "tab", "tabs", "br", "cr", "txbxContent", "type")
+)
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+# Elements whose content paragraph.text leaves out: textboxes, and the duplicate
+# copy of drawings Word writes for older readers
+_W_SKIPPED = (_W_TXBX_CONTENT, _MC_FALLBACK)
+
+
+def _extract_pdf_pages(file_path: str, page_range: range) -> list[str]:
+    # Top-level so it can be pickled for worker processes. Each worker opens the
+    # PDF once and extracts a contiguous range of pages.
+    page_texts = []
+    with pdfplumber.open(file_path) as pdf:
+        for i in page_range:
+            page_text = pdf.pages[i].extract_text()
+            if page_text:
+                page_texts.append(page_text)
+    return page_texts
+
 # Strategy Interface
 class DocumentTextExtractor(ABC):
     @abstractmethod
@@ -13,34 +63,91 @@ class DocumentTextExtractor(ABC):
         pass
 
     def clean_text_unicode(text: str) -> str:
-        cleaned = []
-        for ch in text:
-            if ch.isprintable() and unicodedata.category(ch)[0] != "C":
-                cleaned.append(ch)
-            else:
-                cleaned.append(" ")  # replace junk with a space
-        # Normalize multiple spaces
-        return re.sub(r"\s+", " ", "".join(cleaned)).strip()
+        cleaned = text.translate(_CLEAN_TABLE)
+        # Normalize multiple spaces; split() uses the same whitespace set as \s and also strips
+        return " ".join(cleaned.split())
 
 
 # Concrete Strategy 1 — PDF extractor
 class PDFTextExtractor(DocumentTextExtractor):
+    """
+    Pages are extracted serially unless the PDF has at least parallel_min_pages pages
+    or max_workers is passed, in which case a process pool splits the pages between workers.
+    Worker processes re-import the calling script on spawn-start platforms (macOS, Windows),
+    so scripts that can use the pool must guard their entry point with `if __name__ == "__main__":`.
+    On Linux the workers are forked from the calling process, including any model it has loaded.
+    """
+    def __init__(self, max_workers: int = None, parallel_min_pages: int = 64):
+        self.max_workers = max_workers
+        self.parallel_min_pages = parallel_min_pages
+
     def extract_text(self, file_path: str) -> str:
-        text = ""
         with pdfplumber.open(file_path) as pdf:
             total_pages = len(pdf.pages)
-            for page in tqdm(pdf.pages, total=total_pages, desc="Processing PDF", unit="page"):
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text
+            if self.max_workers is None and total_pages < self.parallel_min_pages:
+                # Short PDFs extract faster in-process than it takes to start a pool
+                page_texts = []
+                for page in tqdm(pdf.pages, total=total_pages, desc="Processing PDF", unit="page"):
+                    page_text = page.extract_text()
+                    if page_text:
+                        page_texts.append(page_text)
+                return DocumentTextExtractor.clean_text_unicode("\n".join(page_texts))
+
+        # Split the pages into one contiguous range per worker
+        max_workers = self.max_workers or os.cpu_count() or 1
+        step = max(1, -(-total_pages // max_workers))
+        page_ranges = [range(i, min(i + step, total_pages)) for i in range(0, total_pages, step)]
+
+        page_texts = []
+        if len(page_ranges) <= 1:
+            for page_range in page_ranges:
+                page_texts.extend(_extract_pdf_pages(file_path, page_range))
+        else:
+            with ProcessPoolExecutor(max_workers=len(page_ranges)) as executor:
+                results = executor.map(partial(_extract_pdf_pages, file_path), page_ranges)
+                for range_texts in tqdm(results, total=len(page_ranges), desc="Processing PDF", unit="batch"):
+                    page_texts.extend(range_texts)
+        return DocumentTextExtractor.clean_text_unicode("\n".join(page_texts))
 
 
 # Concrete Strategy 2 — DOCX extractor
 class DocxTextExtractor(DocumentTextExtractor):
     def extract_text(self, file_path: str) -> str:
-        doc = docx.Document(file_path)
-        paragraphs = [para.text for para in doc.paragraphs]
+        # Stream word/document.xml instead of building python-docx's object tree.
+        # Elements close in document order, so run text is collected as it is read.
+        paragraphs = []
+        current = []
+        in_tab_stops = False
+        skip_depth = 0
+        with zipfile.ZipFile(file_path) as z, z.open("word/document.xml") as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                tag = elem.tag
+                if tag in _W_SKIPPED:
+                    skip_depth += 1 if event == "start" else -1
+                    continue
+                if skip_depth:
+                    continue
+                if tag == _W_TABS:
+                    # <w:tab> inside <w:tabs> defines tab stops, not tab characters
+                    in_tab_stops = event == "start"
+                elif event == "start":
+                    continue
+                elif tag == _W_T:
+                    if elem.text:
+                        current.append(elem.text)
+                elif tag == _W_TAB:
+                    if not in_tab_stops:
+                        current.append("\t")
+                elif tag == _W_BR:
+                    # Page and column breaks add no text, only line breaks do
+                    if elem.get(_W_TYPE, "textWrapping") == "textWrapping":
+                        current.append("\n")
+                elif tag == _W_CR:
+                    current.append("\n")
+                elif tag == _W_P:
+                    paragraphs.append("".join(current))
+                    current = []
+                    elem.clear()
         text = "\n".join(paragraphs)
         return text
 
@@ -58,10 +165,35 @@ class HTMLTextExtractor(DocumentTextExtractor):
     def extract_text(self, file_path: str) -> str:
         with open(file_path, "r", encoding="utf-8") as f:
             html = f.read()
+        if lxml_html is not None:
+            try:
+                return self._extract_text_lxml(html)
+            except etree.ParserError:
+                # lxml raises this for empty or whitespace-only documents
+                return ""
+            except (etree.LxmlError, ValueError):
+                pass  # anything else lxml cannot parse goes through BeautifulSoup
+
         soup = BeautifulSoup(html, "html.parser")
         text = soup.get_text(separator="\n", strip=True)
         return text
 
+    def _extract_text_lxml(self, html: str) -> str:
+        # Parse the decoded text: given bytes without a declared encoding, libxml2 assumes
+        # Latin-1 rather than the UTF-8 the file was read as
+        html = _XML_DECLARATION_RE.sub("", html, count=1)
+        # lxml's C parser is much faster than html.parser
+        root = lxml_html.document_fromstring(html)
+        # Empty non-visible elements like get_text skips them. Removing them instead would
+        # merge their tail into the previous string and glue the neighbouring words together.
+        # itertext() already leaves out comment text.
+        for elem in list(root.iter("script", "style", "template")):
+            for child in list(elem):
+                elem.remove(child)
+            elem.text = None
+        text = "\n".join(t.strip() for t in root.itertext() if t.strip())
+        return text
+
 
 # Context
 class DocumentProcessor:
@@ -0,0 +1,72 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from embedder import Qwen3Embedder
+
+
+def _hidden_states(batch, seq_len, hidden=4):
+    # Each position gets a distinct vector so the selected token can be identified
+    return torch.arange(batch * seq_len * hidden, dtype=torch.float32).view(batch, seq_len, hidden)
+
+
+def test_last_token_pool_left_padded_texts_of_different_lengths():
+    # A 3-token text left-padded to the 5 tokens of the longer text
+    attention_mask = torch.tensor([[0, 0, 1, 1, 1], [1, 1, 1, 1, 1]])
+    hidden_states = _hidden_states(2, 5)
+
+    pooled = Qwen3Embedder.last_token_pool(hidden_states, attention_mask)
+
+    assert torch.equal(pooled[0], hidden_states[0, 4])
+    assert torch.equal(pooled[1], hidden_states[1, 4])
+
+
+def test_last_token_pool_right_padded_texts_of_different_lengths():
+    attention_mask = torch.tensor([[1, 1, 0, 0, 0], [1, 1, 1, 1, 1]])
+    hidden_states = _hidden_states(2, 5)
+
+    pooled = Qwen3Embedder.last_token_pool(hidden_states, attention_mask)
+
+    assert torch.equal(pooled[0], hidden_states[0, 1])
+    assert torch.equal(pooled[1], hidden_states[1, 4])
+
+
+class _StubTokenizer:
+    # One token per text whose id is the text length
+    def __call__(self, texts, **kwargs):
+        input_ids = torch.tensor([[len(text)] for text in texts])
+        return {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+
+
+class _StubModel(torch.nn.Module):
+    class config:
+        hidden_size = 3
+
+    def forward(self, input_ids, attention_mask, use_cache=False):
+        ids = input_ids.float().unsqueeze(-1)
+        hidden = torch.cat([ids, torch.ones_like(ids), -ids], dim=-1)
+        return type("Output", (), {"last_hidden_state": hidden})
+
+
+def _stub_embedder():
+    # Skip __init__, which downloads the real model
+    embedder = Qwen3Embedder.__new__(Qwen3Embedder)
+    embedder.device = "cpu"
+    embedder.device_is_cuda = False
+    embedder.int8 = False
+    embedder.out_dtype = torch.float32
+    embedder.tokenizer = _StubTokenizer()
+    embedder.model = _StubModel()
+    return embedder
+
+
+def test_embed_returns_sub_batches_in_caller_order():
+    embedder = _stub_embedder()
+    texts = ["a much longer text", "ab", "medium text", "a"]
+
+    batched = embedder.embed(texts, batch_size=2)
+
+    assert batched.shape == (4, 3)
+    for text, embedding in zip(texts, batched):
+        assert (embedding == embedder.embed([text])[0]).all()
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+for module in ("spacy", "torch", "transformers", "pdfplumber", "bs4", "dotenv", "pinecone"):
+    pytest.importorskip(module)
+
+from document import DocumentCollection
+from ingestion_pipeline import IngestionPipeline, PINECONE_MAX_REQUEST_BYTES
+
+
+class _Result:
+    def get(self):
+        return None
+
+
+class _FakeIndex:
+    def __init__(self):
+        self.requests = []
+
+    def upsert(self, vectors, async_req=False):
+        self.requests.append(vectors)
+        return _Result()
+
+
+def _documents(count, dim=2560):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    texts = ["Alice was beginning to get very tired " * 20] * count
+    return DocumentCollection.from_batches([(vectors, texts, "alice.txt")])
+
+
+def _upload(documents, **kwargs):
+    pipeline = IngestionPipeline(chunker=None, embedder=None)
+    index = _FakeIndex()
+    pipeline.__dict__["index"] = index  # skip the real Pinecone client
+    pipeline.pinecone_upload(documents, **kwargs)
+    return index.requests
+
+
+def test_pinecone_upload_keeps_requests_under_the_size_limit():
+    requests = _upload(_documents(100))
+
+    assert len(requests) > 1
+    for vectors in requests:
+        assert len(json.dumps(vectors)) <= PINECONE_MAX_REQUEST_BYTES
+    assert [v[0] for batch in requests for v in batch] == [f"chunk-{i}" for i in range(1, 101)]
+
+
+def test_pinecone_upload_respects_batch_size_for_small_vectors():
+    requests = _upload(_documents(25, dim=8), batch_size=10)
+
+    assert [len(vectors) for vectors in requests] == [10, 10, 5]
@@ -0,0 +1,73 @@
+import zipfile
+
+import pytest
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("bs4")
+
+from preprocessor import DocxTextExtractor, HTMLTextExtractor
+
+
+_DOCX_NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+
+
+def _write_docx(path, body):
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("word/document.xml", f"<w:document {_DOCX_NAMESPACES}><w:body>{body}</w:body></w:document>")
+    return str(path)
+
+
+def test_docx_textbox_is_left_out_of_host_paragraph(tmp_path):
+    # Word writes the textbox twice: once for new readers and once as a VML fallback
+    textbox = "<w:txbxContent><w:p><w:r><w:t>Box</w:t></w:r></w:p></w:txbxContent>"
+    body = (
+        "<w:p><w:r><w:t>Para</w:t></w:r><w:r><mc:AlternateContent>"
+        f"<mc:Choice Requires=\"wps\"><w:drawing><wps:txbx>{textbox}</wps:txbx></w:drawing></mc:Choice>"
+        f"<mc:Fallback><w:pict><v:textbox>{textbox}</v:textbox></w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r><w:r><w:t>graph</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t>Second</w:t></w:r></w:p>"
+    )
+    path = _write_docx(tmp_path / "textbox.docx", body)
+
+    assert DocxTextExtractor().extract_text(path) == "Paragraph\nSecond"
+
+
+def test_docx_only_line_breaks_become_newlines(tmp_path):
+    body = (
+        "<w:p><w:pPr><w:tabs><w:tab w:val=\"left\" w:pos=\"720\"/></w:tabs></w:pPr><w:r>"
+        "<w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t><w:br w:type=\"page\"/>"
+        "<w:t>d</w:t><w:br w:type=\"column\"/><w:t>e</w:t><w:cr/><w:t>f</w:t>"
+        "</w:r></w:p>"
+    )
+    path = _write_docx(tmp_path / "breaks.docx", body)
+
+    assert DocxTextExtractor().extract_text(path) == "a\tb\ncde\nf"
+
+
+def _write_html(path, html):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    return str(path)
+
+
+@pytest.mark.parametrize("html, expected", [
+    # Saved web pages start with a comment outside the <html> element
+    ("<!-- saved from url=(0014)about:internet -->\n<html><body><p>Hi</p><!-- c --> tail<script>x=1</script>after</body></html>",
+     "Hi\ntail\nafter"),
+    ("", ""),
+    ("  \n ", ""),
+    # UTF-8 without a <meta charset> or XML declaration
+    ("<html><body><p>café</p></body></html>", "café"),
+    ('<?xml version="1.0" encoding="utf-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml"><body><p>café</p></body></html>',
+     "café"),
+    ("<html><body><p>A</p><template><p>hidden</p></template><style>p {}</style>B</body></html>", "A\nB"),
+])
+def test_html_text_matches_beautifulsoup(tmp_path, html, expected):
+    path = _write_html(tmp_path / "page.html", html)
+
+    assert HTMLTextExtractor().extract_text(path) == expected